@@ -3,18 +3,78 @@ This module contains the class Block. A block is a list of transactions. The fir
 """
 
 import hashlib
-import json
+import os
+import struct
+from itertools import count
+from multiprocessing import Pool
 import config
 import utils
+from transaction import Transaction, verify_batch
 from rich.console import Console
 from rich.table import Table
 
 
+_PROOF = struct.Struct(">Q")  # proof of work, last 8 bytes of the hashed layout
+_HASHED_FIELDS = frozenset(("index", "timestamp", "transactions", "proof", "previous_hash"))
+
+
 class InvalidBlock(Exception):
     pass
 
 
+def target(difficulty):
+    """
+    Return the proof of work target: a hash starting with difficulty hexadecimal 0 is, read as a 256-bit
+    big-endian integer, strictly lower than this value.
+    :param difficulty: the number of 0 the hash must start with
+    :return: int
+    """
+    return 1 << (256 - 4 * difficulty)
+
+
+def _ceiling(difficulty):
+    """
+    Largest valid digest for difficulty, as 32 big-endian bytes. Digests of the same length compare as bytes in the
+    same order as the integers they encode, so a valid digest is simply one <= the ceiling.
+    :return: bytes
+    """
+    return (target(difficulty) - 1).to_bytes(32, 'big')
+
+
+def _search_range(args):
+    """
+    Worker of Block.mine_parallel(): look for a proof in [start, stop) for the given block header.
+    :param args: (header, start, stop, ceiling)
+    :return: the smallest valid proof of the range, or None
+    """
+    header, start, stop, ceiling = args
+    return _first_proof(hashlib.sha256(header), range(start, stop), ceiling)
+
+
+def _first_proof(midstate, proofs, ceiling):
+    """
+    Inner loop of the proof of work: the first proof of proofs whose digest is <= ceiling (see _ceiling()).
+    Everything used per attempt is bound to a local name to keep the loop body short, and digests are compared as
+    bytes so no integer is built per attempt.
+    :param midstate: SHA256 state after the block header
+    :param proofs: iterable of candidate proofs
+    :return: the proof, or None if proofs is exhausted
+    """
+    copy = midstate.copy
+    pack = _PROOF.pack
+    for proof in proofs:
+        h = copy()
+        h.update(pack(proof))
+        if h.digest() <= ceiling:
+            return proof
+    return None
+
+
 class Block(object):
+    # No per-instance __dict__: a loaded chain holds one instance per block
+    __slots__ = ("index", "timestamp", "transactions", "proof", "previous_hash",
+                 "_cached_digest", "_cached_hash", "_tx_root", "_previous_digest")
+
     def __init__(self, data=None):
         """
         If data is None, create a new genesis block. Otherwise, create a block from data (a dictionary).
@@ -26,6 +86,49 @@ class Block(object):
         self.proof = 0
         self.previous_hash = "0" * 64 
 
+    def __setattr__(self, name, value):
+        """
+        The hash of the block, the digest of its transactions (see tx_root()) and the decoded previous_hash are
+        cached. Assigning any hashed field invalidates them; valid_proof() also recomputes the digest of the
+        transactions, in case the list was modified in place after the block was hashed.
+        """
+        if name in _HASHED_FIELDS:
+            object.__setattr__(self, "_cached_digest", None)
+            object.__setattr__(self, "_cached_hash", None)
+            if name == "transactions":
+                object.__setattr__(self, "_tx_root", None)
+            elif name == "previous_hash":
+                object.__setattr__(self, "_previous_digest", None)
+        object.__setattr__(self, name, value)
+
+    def to_dict(self):
+        """
+        JSON-compatible representation of the block, used by persistence.py.
+        :return: dict
+        """
+        return {
+            "index": self.index,
+            "transactions": [t.data for t in self.transactions],
+            "timestamp": self.timestamp,
+            "previous_hash": self.previous_hash,
+            "proof": self.proof,
+        }
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Rebuild a block from to_dict(). The block is not validated.
+        :param data: dict
+        :return: Block
+        """
+        block = Block()
+        block.index = data.get("index", 0)
+        block.timestamp = data.get("timestamp")
+        block.transactions = [Transaction.from_data(t) for t in data.get("transactions", [])]
+        block.previous_hash = data.get("previous_hash")
+        block.proof = data.get("proof", 0)
+        return block
+
     def next(self, transactions):
         """
         Create a block following the current block
@@ -40,21 +143,73 @@ class Block(object):
         new_block.proof = 0
         return new_block
 
+    def tx_root(self):
+        """
+        SHA256 of the concatenated SHA256 digests of the transactions (Transaction.payload_bytes(), in block order).
+        Computed once per list of transactions, so mining and repeated hashing do not serialize them again;
+        valid_proof() recomputes it (see _refresh_tx_root()).
+        :return: bytes (32)
+        """
+        if self._tx_root is None:
+            self._tx_root = self._compute_tx_root()
+        return self._tx_root
+
+    def _compute_tx_root(self):
+        """tx_root() of the current transactions, without the cache."""
+        return hashlib.sha256(b"".join(
+            hashlib.sha256(t.payload_bytes()).digest()
+            for t in self.transactions)).digest()
+
+    def _refresh_tx_root(self):
+        """
+        Recompute tx_root() from the current transactions. If the list was modified in place since the block was
+        hashed (e.g. a transaction replaced), the cached root and the hash derived from it are replaced.
+        """
+        tx_root = self._compute_tx_root()
+        if tx_root != self._tx_root:
+            object.__setattr__(self, "_cached_digest", None)
+            object.__setattr__(self, "_cached_hash", None)
+            object.__setattr__(self, "_tx_root", tx_root)
+
+    def previous_digest(self):
+        """
+        previous_hash as 32 raw bytes. previous_hash stays hex (JSON, display, comparisons with hash()); it is
+        decoded once per block instead of at every header computation.
+        :return: bytes
+        """
+        if self._previous_digest is None:
+            self._previous_digest = bytes.fromhex(self.previous_hash)
+        return self._previous_digest
+
+    def _header(self):
+        """
+        Binary layout of the block, without the proof of work:
+        index (8 bytes, big-endian) | previous_hash (32 bytes) | tx_root (32 bytes) | timestamp (UTF-8).
+        The proof is appended last (8 bytes, big-endian), so this part does not change while mining.
+        :return: bytes
+        """
+        return (struct.pack(">Q", self.index) + self.previous_digest() + self.tx_root()
+                + self.timestamp.encode())
+
     def hash(self):
         """
-        Hash the current block (SHA256). The dictionary representing the block is sorted to ensure the same hash for
-        two identical block. The transactions are part of the block and are not sorted.
+        Hash the current block (SHA256) over the binary layout described in _header(). The transactions are part
+        of the block and are not sorted.
         :return: a string representing the hash of the block
         """
-        block_dict = {
-            "index": self.index,
-            "timestamp": self.timestamp,
-            "transactions": [t.data for t in self.transactions],
-            "proof": self.proof,
-            "previous_hash": self.previous_hash
-        }
-        block_string = json.dumps(block_dict, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        if self._cached_hash is None:
+            self._cached_hash = self._digest().hex()
+        return self._cached_hash
+
+    def _digest(self):
+        """
+        Raw SHA256 digest of the block (32 bytes), see hash(). Cached until a hashed field is assigned or
+        valid_proof() finds that the transactions changed.
+        :return: bytes
+        """
+        if self._cached_digest is None:
+            self._cached_digest = hashlib.sha256(self._header() + _PROOF.pack(self.proof)).digest()
+        return self._cached_digest
 
     def __str__(self):
         """
@@ -69,25 +224,48 @@ class Block(object):
         of 0 equal to difficulty.
 
         If index is 0, the proof of work is valid.
+        The digest is that of the current transactions, even if the list was modified in place.
         :param difficulty: the number of 0 the hash must start with
         :return: True or False
         """
         if self.index == 0:
             return True
-        prefix = '0' * difficulty
-        return self.hash().startswith(prefix)
+        self._refresh_tx_root()
+        return self._digest() <= _ceiling(difficulty)
 
     def mine(self, difficulty=config.default_difficulty):
         """
         Mine the current block. The block is valid if the hash of the block starts with a number of 0 equal to
         config.default_difficulty.
+
+        The header is hashed once; each attempt copies that SHA256 state and only feeds the 8 bytes of the proof.
         :return: the proof of work
         """
-        prefix = '0' * difficulty
-        while not self.hash().startswith(prefix):
-            self.proof += 1
+        self.proof = _first_proof(hashlib.sha256(self._header()), count(self.proof), _ceiling(difficulty))
         return self.proof
 
+    def mine_parallel(self, difficulty=config.default_difficulty, n_workers=None, chunk=1 << 14):
+        """
+        Mine the current block on several processes. The proofs from self.proof onwards are split into ranges of
+        chunk proofs; each round gives one range to each worker. The smallest valid proof of a round is kept, so
+        the result is the same as mine(). Only worth it for high difficulties: starting the workers costs more
+        than the few thousand attempts of the default difficulty.
+        :param n_workers: number of processes (default: os.cpu_count())
+        :return: the proof of work
+        """
+        n_workers = n_workers or os.cpu_count() or 1
+        ceiling = _ceiling(difficulty)
+        header = self._header()
+        start = self.proof
+        with Pool(n_workers) as pool:
+            while True:
+                ranges = [(header, start + i * chunk, start + (i + 1) * chunk, ceiling) for i in range(n_workers)]
+                found = [p for p in pool.map(_search_range, ranges) if p is not None]
+                if found:
+                    self.proof = min(found)
+                    return self.proof
+                start += n_workers * chunk
+
     def validity(self):
         """
         Check if the block is valid. A block is valid if it is a genesis block or if:
@@ -105,17 +283,15 @@ class Block(object):
         if not (0 <= len(self.transactions) <= config.blocksize):
             return False
 
-        for t in self.transactions:
-            if not t.verify():
-                return False
-
-        return True
+        return verify_batch(self.transactions)
 
     def log(self):
         """
-        A nice log of the block
+        A nice log of the block (nothing when config.verbose is False)
         :return: None
         """
+        if not config.verbose:
+            return
         table = Table(
             title=f"Block #{self.index} -- {self.hash()[:7]}...{self.hash()[-7:]} -> {self.previous_hash[:7]}...{self.previous_hash[-7:]}")
         table.add_column("Author", justify="right", style="cyan")
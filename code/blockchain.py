@@ -2,16 +2,22 @@
 This module contains the class Blockchain. A blockchain is a list of blocks and a mempool.
 It manages the state of confidential balances using commitments (hashes).
 """
+import os
 import random
+from concurrent.futures import ProcessPoolExecutor
 import config
 from block import Block, InvalidBlock
-from transaction import Transaction
+from transaction import Transaction, IncompleteTransaction
 import zk_sim as zk # Nécessaire pour les tests
 
+# En dessous de ce nombre de blocs par processus, démarrer un processus (et lui envoyer les blocs) coûte plus que ce
+# qu'il fait gagner, e.g. pour les quelques blocs d'un merge()
+_MIN_BLOCKS_PER_WORKER = 4
+
 class Blockchain(object):
     def __init__(self):
         self.chain = [Block()] # List of blocks
-        self.mempool = set()   # Set of transactions
+        self.mempool = {}      # Mapping transaction hash -> transaction
         self.state_hashes = {} # Mapping address (author) -> last_known_balance_commitment
 
     @property
@@ -27,11 +33,15 @@ class Blockchain(object):
         - Verify that the sender's old balance hash matches the current blockchain state
         """
         # 1. Vérification cryptographique pure (Signature + ZK Proof mathématique)
-        if transaction in self.mempool:
+        try:
+            tx_hash = transaction.hash()
+        except IncompleteTransaction:
+            return False
+        if tx_hash in self.mempool:
             return False
             
         if not transaction.verify():
-            print(f"Refus Tx {transaction.hash()[:8]}... : Signature ou Preuve invalide.")
+            print(f"Refus Tx {tx_hash[:8]}... : Signature ou Preuve invalide.")
             return False
         
         # 2. Vérification contextuelle (Double dépense / Cohérence d'état)
@@ -47,7 +57,7 @@ class Blockchain(object):
                 print(f"Refus Tx: Hash solde incohérent. Attendu: {expected_hash[:10]}...")
                 return False
         
-        self.mempool.add(transaction)
+        self.mempool[tx_hash] = transaction
         return True
     
     def new_block(self, block=None):
@@ -58,9 +68,9 @@ class Blockchain(object):
             block = self.last_block
         
         # Select transactions for the new block
-        # Note: sorted() utilise transaction.__lt__ (basé sur la date)
+        # Note: le tirage est aléatoire, trier la mempool (par date) avant ne changeait rien à la sélection
         num_transactions = min(config.blocksize, len(self.mempool))
-        selected_transactions = random.sample(sorted(self.mempool), num_transactions)
+        selected_transactions = random.sample(list(self.mempool.values()), num_transactions)
         
         new_block = block.next(selected_transactions)
         return new_block
@@ -80,14 +90,16 @@ class Blockchain(object):
         self.chain.append(block)
         
         for tx in block.transactions:
+            public_inputs = tx.public_inputs
             # 1. Mise à jour de l'EXPÉDITEUR (Lui, on remplace car c'est un "Reste à vivre")
-            if tx.author and "h_new" in tx.public_inputs:
-                self.state_hashes[tx.author] = tx.public_inputs["h_new"]
+            if tx.author and "h_new" in public_inputs:
+                self.state_hashes[tx.author] = public_inputs["h_new"]
             
             # 2. Mise à jour du DESTINATAIRE (Lui, on ADDITIONNE)
-            if hasattr(tx, 'receiver') and tx.receiver and "h_val" in tx.public_inputs:
+            # receiver est toujours défini par Transaction.__init__ (None par défaut)
+            if tx.receiver and "h_val" in public_inputs:
                 receiver_addr = tx.receiver
-                amount_commitment = tx.public_inputs["h_val"]
+                amount_commitment = public_inputs["h_val"]
                 
                 # Vérifier si le destinataire a déjà un solde
                 if receiver_addr in self.state_hashes:
@@ -104,45 +116,79 @@ class Blockchain(object):
         
         # Nettoyage de la mempool
         for transaction in block.transactions:
-            if transaction in self.mempool:
-                self.mempool.remove(transaction)
+            self.mempool.pop(transaction.hash(), None)
 
-    def validity(self):
-        """Check the validity of the chain."""
+    def validity(self, n_workers=None):
+        """
+        Check the validity of the chain, in two passes:
+        1. the hash links between consecutive blocks and the absence of duplicated transactions (cheap, serial);
+        2. the validity of each block (proof of work, signatures and ZK proofs), which does not depend on the
+           other blocks and is spread over a pool of processes (serial for short chains, see _MIN_BLOCKS_PER_WORKER).
+        :param n_workers: number of processes for the second pass (default: os.cpu_count(); 1 stays in-process)
+        """
         if self.chain[0].index != 0 or self.chain[0].previous_hash != "0" * 64:
             return False
+        return self._valid_from(1, n_workers)
 
+    def _valid_from(self, start, n_workers=None):
+        """
+        Check the blocks self.chain[start:], the blocks before start being known to be valid: links from start on,
+        no transaction of these blocks already in the chain, validity of each of these blocks (see validity()).
+        """
         seen_transactions = set()
+        for block in self.chain[:start]:
+            for transaction in block.transactions:
+                seen_transactions.add(transaction.hash())
 
-        for i in range(1, len(self.chain)):
-            block = self.chain[i]
-            previous_block = self.chain[i - 1]
-
-            if not block.validity():
-                return False
+        blocks = self.chain[start:]
 
-            if block.previous_hash != previous_block.hash():
-                return False
+        # Liens entre blocs : une seule comparaison de listes (faite en C), les hash des blocs étant en cache
+        if [block.previous_hash for block in blocks] != [block.hash() for block in self.chain[start - 1:-1]]:
+            return False
 
+        for block in blocks:
             for transaction in block.transactions:
-                if transaction in seen_transactions:
+                tx_hash = transaction.hash()
+                if tx_hash in seen_transactions:
                     return False
-                seen_transactions.add(transaction)
+                seen_transactions.add(tx_hash)
 
-        return True
+        n_workers = min(n_workers or os.cpu_count() or 1, len(blocks) // _MIN_BLOCKS_PER_WORKER)
+        if n_workers <= 1:
+            return all(block.validity() for block in blocks)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            return all(executor.map(Block.validity, blocks, chunksize=max(1, len(blocks) // n_workers)))
+
+    def fork_index(self, other):
+        """
+        Index of the first block where the two chains differ (the length of the shortest chain if one chain is a
+        prefix of the other).
+        """
+        for i, (mine, theirs) in enumerate(zip(self.chain, other.chain)):
+            if mine.hash() != theirs.hash():
+                return i
+        return min(len(self.chain), len(other.chain))
 
     def merge(self, other):
-        """Merge logic."""
-        if len(other.chain) > len(self.chain) and other.validity():
-            self.chain = other.chain
-            self.state_hashes = other.state_hashes.copy()
-            
-            # Rebuild mempool
-            all_transactions = set()
-            for block in self.chain:
-                for transaction in block.transactions:
-                    all_transactions.add(transaction)
-            self.mempool = {t for t in self.mempool if t not in all_transactions}
+        """
+        Merge logic: adopt other if it is longer and valid. The current chain is assumed valid, so only the blocks
+        of other after the common prefix are checked; the whole chain is checked only if even the genesis differs.
+        """
+        if len(other.chain) <= len(self.chain):
+            return
+        fork = self.fork_index(other)
+        if not (other._valid_from(fork) if fork > 0 else other.validity()):
+            return
+
+        self.chain = other.chain
+        self.state_hashes = other.state_hashes.copy()
+        
+        # Rebuild mempool
+        all_transactions = set()
+        for block in self.chain:
+            for transaction in block.transactions:
+                all_transactions.add(transaction.hash())
+        self.mempool = {h: t for h, t in self.mempool.items() if h not in all_transactions}
 
     def __str__(self):
         return f"Blockchain: {len(self.chain)} blocks, {len(self.mempool)} pending txs, {len(self.state_hashes)} accounts."
@@ -150,11 +196,15 @@ class Blockchain(object):
     def __len__(self):
         return len(self.chain)
 
-    def display_content(self):
+    def display_content(self, tail=10):
         """
         Affiche le contenu avec Rich (comme dans votre exemple).
         J'ai adapté les clés pour utiliser h_old/h_new.
+        :param tail: nombre de derniers blocs affichés (None pour toute la chaîne, 0 ou moins pour aucun)
+        Rien n'est affiché si config.verbose est False.
         """
+        if not config.verbose:
+            return
         from rich.console import Console
         from rich.table import Table
         from rich.panel import Panel
@@ -171,8 +221,15 @@ class Blockchain(object):
                 state_table.add_row(f"{address[:10]}...", f"{hash_val[:20]}...")
             console.print(state_table)
 
-        # Blocks
-        for block in self.chain:
+        # Blocks (seulement les derniers : le rendu ne grossit pas avec la chaîne)
+        # tail <= 0 : aucun bloc (self.chain[-0:] serait la chaîne entière)
+        if tail is None:
+            shown = self.chain
+        else:
+            shown = self.chain[-tail:] if tail > 0 else []
+        if len(shown) < len(self.chain):
+            console.print(f"\n[dim]... {len(self.chain) - len(shown)} bloc(s) plus ancien(s) non affiché(s)[/dim]")
+        for block in shown:
             console.print(f"\n[bold]Block #{block.index}[/bold] (Tx: {len(block.transactions)})")
             if block.transactions:
                 tx_table = Table(show_header=True)
@@ -2,7 +2,12 @@
 Configuration file for the blockchain. Initialization of various parameters.
 """
 
+import os
+
 blockdepth = 2
 blocksize = 2 ** blockdepth - 1  # Number of messages in a block
 
 default_difficulty = 3
+
+# Rich tables and panels, demo pauses. ZK_VERBOSE=0 turns them off, e.g. to time the demo scripts
+verbose = os.environ.get("ZK_VERBOSE", "1") != "0"
@@ -5,7 +5,6 @@ Streamlit Interface for Confidential Blockchain (ZK-SNARKs)
 import streamlit as st
 import json
 import random
-import os
 from ecdsa import SigningKey, NIST256p
 from blockchain import Blockchain
 from transaction import Transaction
@@ -16,16 +15,27 @@ from utils import get_time
 # On essaie d'importer les fonctions de sauvegarde.
 # Si le fichier persistence.py n'existe pas, on utilise des fonctions "vides" pour ne pas faire planter l'interface.
 try:
-    from persistence import load_authors, save_authors, load_blockchain, save_blockchain
+    from persistence import load_authors, save_authors, load_blockchain, save_blockchain, save_state, delete_blockchain
 except ImportError:
     def load_authors(): return {}
     def save_authors(data): pass
     def load_blockchain(): return Blockchain()
     def save_blockchain(bc): pass
+    def save_state(bc): pass
+    def delete_blockchain(): pass
 
 # Configuration de la page Streamlit
 st.set_page_config(page_title="ZK Blockchain", layout="wide", page_icon="🔐")
 
+
+@st.cache_data
+def compute_commitment(balance: int, nonce: int) -> str:
+    """
+    zk.commit() mémorisé : Streamlit réexécute tout le script à chaque interaction, et la vérification de
+    synchronisation du wallet recalculait le même commitment (2 multiplications sur la courbe) à chaque fois.
+    """
+    return zk.commit(balance, nonce)
+
 # ============================================================================
 # 1. INITIALISATION DE LA MÉMOIRE (SESSION STATE)
 # ============================================================================
@@ -43,9 +53,18 @@ if "blockchain" not in st.session_state:
 if "authors" not in st.session_state:
     st.session_state.authors = load_authors()
 
+# Index inverse adresse -> nom, pour l'affichage du registre (mis à jour à la création de compte et au reset)
+if "addr_to_name" not in st.session_state:
+    st.session_state.addr_to_name = {d['address']: n for n, d in st.session_state.authors.items()}
+
 if "current_author" not in st.session_state:
     st.session_state.current_author = None
 
+# Clés privées déjà parsées (nom -> SigningKey) : sk_pem reste la source de vérité sur disque,
+# ce cache évite seulement de reparser le PEM à chaque transaction pendant la session.
+if "sk_cache" not in st.session_state:
+    st.session_state.sk_cache = {}
+
 # ============================================================================
 # 2. BARRE LATÉRALE (SIDEBAR) - GESTION DU WALLET
 # ============================================================================
@@ -80,6 +99,7 @@ if st.sidebar.button("Create Account"):
                 "nonce": init_nonce
             }
         }
+        st.session_state.addr_to_name[address] = new_author_name
         
         # 4. Injection dans la Blockchain (Simulation de Minting)
         st.session_state.blockchain.state_hashes[address] = genesis_comm
@@ -87,7 +107,8 @@ if st.sidebar.button("Create Account"):
         # 5. Sauvegarde sur le disque
         save_authors(st.session_state.authors)
         
-        save_blockchain(st.session_state.blockchain) # Décommentez si vous implémentez la sauvegarde complète
+        # Aucun bloc n'a été ajouté : seul l'état (state_hashes) est réécrit, pas le journal des blocs
+        save_state(st.session_state.blockchain)
         
         st.sidebar.success(f"Account '{new_author_name}' created!")
         st.session_state.current_author = new_author_name
@@ -117,7 +138,7 @@ if author_list:
         
         # Vérification de synchro Wallet <-> Blockchain
         on_chain_hash = st.session_state.blockchain.state_hashes.get(user_data['address'])
-        my_calc_hash = zk.commit(priv['balance'], priv['nonce'])
+        my_calc_hash = compute_commitment(priv['balance'], priv['nonce'])
         
         if on_chain_hash == my_calc_hash:
             st.markdown("✅ **Synced with Chain**")
@@ -135,15 +156,16 @@ if st.sidebar.button("🔴 RESET SYSTEM", type="primary"):
     # 1. Vider la mémoire de l'application
     st.session_state.blockchain = Blockchain()
     st.session_state.authors = {}
+    st.session_state.addr_to_name = {}
+    st.session_state.sk_cache = {}
     st.session_state.current_author = None
     
     # 2. Mettre à jour les fichiers JSON pour la persistance
     # On sauvegarde un dictionnaire vide pour écraser les anciennes données
     save_authors({})
     
-    # On supprime la blockchain si elle existe (ou on la vide)
-    if os.path.exists("blockchain.json"):
-        os.remove("blockchain.json")
+    # On supprime la blockchain si elle existe (journal des blocs + état)
+    delete_blockchain()
     
     st.sidebar.success("System Reset Complete.")
     st.rerun()
@@ -176,7 +198,7 @@ if st.session_state.current_author:
         my_secret_nonce = sender_data['private']['nonce']
         
         # On recalcule notre hash local pour voir s'il matche la blockchain
-        my_calc_hash = zk.commit(my_secret_bal, my_secret_nonce)
+        my_calc_hash = compute_commitment(my_secret_bal, my_secret_nonce)
         
         if current_chain_hash and current_chain_hash != my_calc_hash:
             st.error("⚠️ Wallet desynchronized! You likely have pending transactions.")
@@ -205,7 +227,10 @@ if st.session_state.current_author:
                 proof = zk.prove(my_secret_bal, my_secret_nonce)
                 
                 # --- ÉTAPE 3 : CRÉATION DE L'OBJET TRANSACTION ---
-                sk = SigningKey.from_pem(sender_data['sk_pem'].encode())
+                sk = st.session_state.sk_cache.get(sender_name)
+                if sk is None:
+                    sk = SigningKey.from_pem(sender_data['sk_pem'].encode())
+                    st.session_state.sk_cache[sender_name] = sk
                 
                 tx = Transaction(
                     public_inputs={
@@ -276,14 +301,18 @@ with col_chain:
             block.mine()
             st.session_state.blockchain.extend_chain(block)
             
-            # Sauvegarde de la blockchain (si implémenté)
+            # Sauvegarde de la blockchain : seul le nouveau bloc est ajouté au journal
             save_blockchain(st.session_state.blockchain)
             
             st.success("Block Mined!")
             st.rerun()
 
-    # Affichage des blocs
-    for i, block in enumerate(reversed(st.session_state.blockchain.chain)):
+    # Affichage des blocs (seulement les N derniers, pour que chaque rerun reste rapide)
+    chain = st.session_state.blockchain.chain
+    n_shown = min(10, len(chain))
+    if len(chain) > 1:
+        n_shown = st.slider("Show last N blocks", 1, len(chain), n_shown)
+    for i, block in enumerate(reversed(chain[-n_shown:])):
         with st.expander(f"Block #{block.index} - {block.hash()[:10]}...", expanded=(i==0)):
             st.write(f"**Tx Count:** {len(block.transactions)}")
             if block.transactions:
@@ -299,7 +328,7 @@ with col_chain:
 with col_pool:
     st.subheader("📥 Mempool")
     if st.session_state.blockchain.mempool:
-        for tx in st.session_state.blockchain.mempool:
+        for tx in st.session_state.blockchain.mempool.values():
             st.info(f"Tx from `{tx.author[:8]}...`\nProof Verified ✅")
     else:
         st.write("Empty")
@@ -314,9 +343,7 @@ if st.session_state.blockchain.state_hashes:
     state_rows = []
     for addr, h in st.session_state.blockchain.state_hashes.items():
         # On essaie de retrouver le nom pour l'affichage (facultatif)
-        name = "Unknown"
-        for n, d in st.session_state.authors.items():
-            if d['address'] == addr: name = n
+        name = st.session_state.addr_to_name.get(addr, "Unknown")
             
         state_rows.append({
             "User": name,
@@ -6,23 +6,74 @@ Authors are serialized as:
     "name": { "sk_hex": "...", "author_hash": "...", "vk_hex": "..." }
   }
 
-Blockchain is serialized as:
+The blockchain is stored as an append-only log plus a small state snapshot, so that saving after a new block only
+writes that block:
+  blockchain.log: one record per block, { "index": ..., "transactions": [...], "timestamp": "...",
+                  "previous_hash": "...", "proof": ... } (see Block.to_dict()). The records are MessagePack
+                  after a 4-byte LOG_MAGIC header when msgpack is installed, JSON lines otherwise; appending
+                  keeps the format of the existing file.
+  state_hashes.json: { "height": number of blocks in the log, "last_hash": "...", "log_size": bytes,
+                       "state_hashes": { "address": "commitment_hash" } }
+
+The former single-file format (blockchain.json):
   {
     "chain": [ { "transactions": [...], "timestamp": "...", "previous_hash": "...", "proof": ... } ],
     "state_hashes": { "address": "commitment_hash" }
   }
+is still read when no log exists.
 """
 
 import json
 import os
 from ecdsa import SigningKey
+try:
+    import orjson  # C implementation, several times faster than json; optional
+except ImportError:
+    orjson = None
+try:
+    import msgpack  # compact binary encoding for the block log; optional
+except ImportError:
+    msgpack = None
+try:
+    import ijson  # incremental JSON parser, to read blockchain.json one block at a time; optional
+except ImportError:
+    ijson = None
 from blockchain import Blockchain
 from block import Block
-from transaction import Transaction
 
 
 AUTHORS_FILE = "authors.json"
-BLOCKCHAIN_FILE = "blockchain.json"
+BLOCKCHAIN_FILE = "blockchain.json"  # former single-file format, read only
+BLOCKCHAIN_LOG = "blockchain.log"
+STATE_FILE = "state_hashes.json"
+LOG_MAGIC = b"ZKB\x01"  # first bytes of a MessagePack block log (a JSON-lines log starts with "{")
+_LOG_BUFFER = 1 << 20  # the block log is written and read in 1 MiB chunks rather than 8 KiB
+
+
+def _dumpb(obj, pretty=False):
+    """JSON of obj as UTF-8 bytes, ready to be written to a binary file (orjson produces bytes directly).
+    Compact unless pretty (2-space indent, for debugging)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _write_file(path, data, sync=False):
+    """Write bytes to path (binary mode, no text codec); with sync, flush them to disk before returning."""
+    with open(path, "wb") as f:
+        f.write(data)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _loads(s):
+    """Parse JSON text (str or bytes), with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
 
 
 def serialize_sk(sk):
@@ -35,11 +86,10 @@ def deserialize_sk(sk_hex):
     return SigningKey.from_string(bytes.fromhex(sk_hex))
 
 
-def save_authors(authors):
-    """Sauvegarde le dictionnaire des auteurs dans un fichier JSON."""
+def save_authors(authors, pretty=False):
+    """Sauvegarde le dictionnaire des auteurs dans un fichier JSON (compact, indenté si pretty)."""
     try:
-        with open(AUTHORS_FILE, "w") as f:
-            json.dump(authors, f, indent=4)
+        _write_file(AUTHORS_FILE, _dumpb(authors, pretty))
     except Exception as e:
         print(f"Erreur sauvegarde auteurs: {e}")
 
@@ -48,8 +98,8 @@ def load_authors():
     if not os.path.exists(AUTHORS_FILE):
         return {}
     try:
-        with open(AUTHORS_FILE, "r") as f:
-            return json.load(f)
+        with open(AUTHORS_FILE, "rb") as f:
+            return _loads(f.read())
     except Exception:
         return {}
 
@@ -60,21 +110,8 @@ def serialize_blockchain(blockchain):
     :param blockchain: Blockchain instance
     :return: Dict with blocks and state_hashes
     """
-    blocks_json = []
-    for block in blockchain.chain:
-        txs_json = []
-        for tx in block.transactions:
-            txs_json.append(tx.data)
-        
-        blocks_json.append({
-            "transactions": txs_json,
-            "timestamp": block.timestamp,
-            "previous_hash": block.previous_hash,
-            "proof": block.proof,
-        })
-    
     return {
-        "chain": blocks_json,
+        "chain": [block.to_dict() for block in blockchain.chain],
         "state_hashes": blockchain.state_hashes,
     }
 
@@ -90,62 +127,273 @@ def deserialize_blockchain(bc_json):
     # Restore state hashes
     blockchain.state_hashes = bc_json.get("state_hashes", {})
     
+    _append_blocks(blockchain, bc_json.get("chain", []))
+    return blockchain
+
+
+def _append_blocks(blockchain, blocks_json):
+    """Rebuild the blocks of a serialized chain and append them to blockchain.
+    
+    :param blocks_json: iterable of block dicts, genesis first (may be a lazy stream)
+    """
     # Restore blocks (skip genesis, it's already created)
-    for i, block_json in enumerate(bc_json.get("chain", [])):
+    for i, block_json in enumerate(blocks_json):
         if i == 0:
             # Skip genesis (already in blockchain.chain)
             continue
         
-        # Reconstruct transactions
-        transactions = []
-        for tx_data in block_json.get("transactions", []):
-            tx = Transaction(
-                public_inputs=tx_data.get("public_inputs"),
-                date=tx_data.get("date"),
-                signature=tx_data.get("signature"),
-                vk=tx_data.get("vk"),
-                author=tx_data.get("author"),
-                zk_proof=tx_data.get("zk_proof"),
-            )
-            transactions.append(tx)
-        
-        # Reconstruct block
-        block = Block()
-        block.index = block_json.get("index", 0)
-        block.timestamp = block_json.get("timestamp")
-        block.transactions = transactions
-        block.previous_hash = block_json.get("previous_hash")
-        block.proof = block_json.get("proof", 0)
+        block = Block.from_dict(block_json)
+        if "index" not in block_json:
+            # Older files did not store the index
+            block.index = i
         
         # Add to chain (bypass validation for simplicity)
         blockchain.chain.append(block)
+
+
+def _load_state():
+    """Read the state snapshot, or None if there is none."""
+    if not os.path.exists(STATE_FILE):
+        return None
+    with open(STATE_FILE, "rb") as f:
+        return _loads(f.read())
+
+
+def _save_state(blockchain, log_size, pretty=False, sync=False):
+    """Rewrite the state snapshot (small: one entry per account)."""
+    state = {
+        "height": len(blockchain.chain),
+        "last_hash": blockchain.last_block.hash(),
+        "log_size": log_size,
+        "state_hashes": blockchain.state_hashes,
+    }
+    _write_file(STATE_FILE, _dumpb(state, pretty), sync)
+
+
+def _encode_block(block, binary):
+    """One record of the block log: MessagePack if binary, else a JSON line."""
+    if binary:
+        return msgpack.packb(block.to_dict(), use_bin_type=True)
+    return _dumpb(block.to_dict()) + b"\n"
+
+
+def save_blockchain(blockchain, pretty=False, sync=False):
+    """Save blockchain: append the blocks that are not in the log yet, then rewrite the state snapshot.
     
-    return blockchain
+    If the saved chain is not a prefix of this one (e.g. after a merge), the log is rewritten. A log holding more
+    blocks than blockchain is never rewritten (ValueError): blockchain was probably not loaded from it; use
+    delete_blockchain() to start over.
+    
+    :param blockchain: Blockchain instance
+    :param pretty: indent the state snapshot (for debugging; the log is one record per block)
+    :param sync: fsync the log, then the snapshot, so that a crash cannot lose a saved block (slower)
+    """
+    state = _load_state() if os.path.exists(BLOCKCHAIN_LOG) else None
+    height = state["height"] if state else 0
+    if height > len(blockchain.chain):
+        raise ValueError(f"the block log holds {height} blocks, more than the {len(blockchain.chain)} to save")
+    if (not height or "log_size" not in state
+            or blockchain.chain[height - 1].hash() != state["last_hash"]):
+        save_blockchain_full(blockchain, pretty, sync)
+        return
+    
+    with open(BLOCKCHAIN_LOG, "r+b", buffering=_LOG_BUFFER) as f:
+        binary = f.read(len(LOG_MAGIC)) == LOG_MAGIC
+        # Anything after log_size was written by an interrupted save and is dropped
+        f.seek(state["log_size"])
+        f.truncate()
+        for block in blockchain.chain[height:]:
+            f.write(_encode_block(block, binary))
+        log_size = f.tell()
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    _save_state(blockchain, log_size, pretty, sync)
 
 
-def save_blockchain(blockchain):
-    """Save blockchain to JSON file.
+def save_state(blockchain, pretty=False, sync=False):
+    """Save only the state snapshot, for changes that add no block (e.g. a new account minted in state_hashes).
+    
+    Falls back to save_blockchain() if the log does not end with the last block of blockchain.
     
     :param blockchain: Blockchain instance
     """
-    bc_json = serialize_blockchain(blockchain)
-    with open(BLOCKCHAIN_FILE, "w", encoding="utf-8") as f:
-        json.dump(bc_json, f, indent=2)
+    state = _load_state() if os.path.exists(BLOCKCHAIN_LOG) else None
+    if (state and "log_size" in state and state["height"] == len(blockchain.chain)
+            and state["last_hash"] == blockchain.last_block.hash()):
+        _save_state(blockchain, state["log_size"], pretty, sync)
+    else:
+        save_blockchain(blockchain, pretty, sync)
+
+
+def save_blockchain_full(blockchain, pretty=False, sync=False):
+    """Rewrite the whole log and the state snapshot. The log is written in MessagePack when msgpack is installed.
+    
+    :param blockchain: Blockchain instance
+    :param pretty, sync: see save_blockchain()
+    """
+    binary = msgpack is not None
+    with open(BLOCKCHAIN_LOG, "wb", buffering=_LOG_BUFFER) as f:
+        if binary:
+            f.write(LOG_MAGIC)
+        for block in blockchain.chain:
+            f.write(_encode_block(block, binary))
+        log_size = f.tell()
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    _save_state(blockchain, log_size, pretty, sync)
 
 
 def load_blockchain():
-    """Load blockchain from JSON file.
+    """Load blockchain from the log (or from the former blockchain.json file).
+    
+    :return: Blockchain instance (or new Blockchain if no file exists)
+    """
+    if not os.path.exists(BLOCKCHAIN_LOG):
+        return _load_legacy_blockchain()
+    
+    try:
+        state = _load_state() or {}
+        height = state.get("height")
+        blockchain = Blockchain()
+        blockchain.state_hashes = state.get("state_hashes", {})
+        with open(BLOCKCHAIN_LOG, "rb", buffering=_LOG_BUFFER) as f:
+            # Anything after log_size (and after height records) was written by an interrupted save: it is never
+            # decoded, since its last record may be partial
+            if f.read(len(LOG_MAGIC)) == LOG_MAGIC:
+                if msgpack is None:
+                    raise ValueError("the block log is in MessagePack format, install msgpack to read it")
+                records = _unpack_records(f, state.get("log_size"))
+            else:
+                f.seek(0)
+                records = _json_records(f, state.get("log_size"))
+            for i, block_json in enumerate(records):
+                if height is not None and i >= height:
+                    break
+                if i == 0:
+                    # Skip genesis (already in blockchain.chain)
+                    continue
+                # Add to chain (bypass validation for simplicity)
+                blockchain.chain.append(Block.from_dict(block_json))
+        return blockchain
+    except (ValueError, KeyError, AttributeError) as e:
+        print(f"Warning: Could not deserialize blockchain: {e}")
+        return Blockchain()
+
+
+def _json_records(f, log_size=None):
+    """Records of a JSON-lines log, up to byte log_size (all of them if None)."""
+    position = 0
+    for line in f:
+        position += len(line)
+        if log_size is not None and position > log_size:
+            return
+        yield _loads(line)
+
+
+def _unpack_records(f, log_size=None):
+    """Records of a MessagePack log (f just after LOG_MAGIC), up to byte log_size (all of them if None)."""
+    if log_size is None:
+        yield from msgpack.Unpacker(f, raw=False)
+        return
+    unpacker = msgpack.Unpacker(raw=False)
+    remaining = log_size - f.tell()
+    while remaining > 0:
+        chunk = f.read(min(remaining, _LOG_BUFFER))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        unpacker.feed(chunk)
+        yield from unpacker
+
+
+def _load_legacy_blockchain():
+    """Load blockchain from the former single JSON file.
     
     :return: Blockchain instance (or new Blockchain if file doesn't exist)
     """
     if not os.path.exists(BLOCKCHAIN_FILE):
         return Blockchain()
     
-    with open(BLOCKCHAIN_FILE, "r", encoding="utf-8") as f:
-        bc_json = json.load(f)
+    if ijson is None:
+        with open(BLOCKCHAIN_FILE, "rb") as f:
+            bc_json = _loads(f.read())
+        try:
+            return deserialize_blockchain(bc_json)
+        except (ValueError, KeyError, AttributeError) as e:
+            print(f"Warning: Could not deserialize blockchain: {e}")
+            return Blockchain()
     
+    # Streaming: only one block is held by the parser at a time (two passes, one per top-level key)
     try:
-        return deserialize_blockchain(bc_json)
-    except (ValueError, KeyError, AttributeError) as e:
+        blockchain = Blockchain()
+        with open(BLOCKCHAIN_FILE, "rb") as f:
+            blockchain.state_hashes = dict(ijson.kvitems(f, "state_hashes"))
+        with open(BLOCKCHAIN_FILE, "rb") as f:
+            _append_blocks(blockchain, ijson.items(f, "chain.item"))
+        return blockchain
+    except (ijson.JSONError, ValueError, KeyError, AttributeError) as e:
         print(f"Warning: Could not deserialize blockchain: {e}")
         return Blockchain()
+
+
+def delete_blockchain():
+    """Remove every saved blockchain file."""
+    for path in (BLOCKCHAIN_LOG, STATE_FILE, BLOCKCHAIN_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# --- TESTS ---
+
+def test1():
+    print("\n--- TEST 1 : Sauvegarde interrompue ---")
+    import tempfile
+    import config
+    from ecdsa import SigningKey, NIST384p
+    from blockchain import generate_valid_tx
+
+    config.verbose = False
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            bc = Blockchain()
+            for i in range(2):
+                bc.add_transaction(generate_valid_tx(SigningKey.generate(curve=NIST384p), 100, i + 1000))
+                block = bc.new_block()
+                block.mine()
+                bc.extend_chain(block)
+            save_blockchain(bc)
+            log_size = os.path.getsize(BLOCKCHAIN_LOG)
+
+            # Une sauvegarde interrompue laisse un enregistrement partiel après log_size
+            binary = msgpack is not None
+            with open(BLOCKCHAIN_LOG, "ab") as f:
+                record = _encode_block(bc.last_block, binary)
+                f.write(record[:len(record) // 2])
+            loaded = load_blockchain()
+            assert len(loaded) == len(bc), "blocs perdus au chargement"
+            assert loaded.last_block.hash() == bc.last_block.hash()
+
+            # L'enregistrement partiel est tronqué, les blocs sauvegardés restent
+            save_state(loaded)
+            save_blockchain(loaded)
+            assert os.path.getsize(BLOCKCHAIN_LOG) == log_size
+            assert len(load_blockchain()) == len(bc)
+
+            # Une chaîne plus courte que le journal ne l'écrase jamais
+            try:
+                save_blockchain(Blockchain())
+                raise AssertionError("le journal a été réécrit")
+            except ValueError:
+                pass
+            assert os.path.getsize(BLOCKCHAIN_LOG) == log_size
+        finally:
+            os.chdir(cwd)
+    print(">> SUCCÈS : aucun bloc perdu.")
+
+
+if __name__ == "__main__":
+    test1()
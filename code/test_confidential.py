@@ -6,15 +6,16 @@ from ecdsa import SigningKey, NIST256p
 from transaction import Transaction
 from blockchain import Blockchain
 import hashlib
+import utils
 
 # --- CORRECTION ICI : On importe le provider réel (py_ecc) ---
 import zk_sim as zk 
 
-from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
-console = Console()
+# ZK_VERBOSE=0 : rien n'est rendu ni affiché (pour chronométrer le scénario), voir config.verbose
+console = utils.get_console()
 
 def print_section(title):
     console.print(Panel(f"[bold cyan]{title}[/bold cyan]", expand=False))
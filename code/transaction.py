@@ -3,20 +3,135 @@ This module defines a transaction class. A transaction is a confidential transac
 The signature can be verified with the public key.
 """
 
+import os
+import config
 import utils
 import json
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
 from ecdsa import VerifyingKey, BadSignatureError
+from ecdsa.curves import curve_by_name
 from rich.console import Console
 from rich.table import Table
+try:
+    # OpenSSL backend for ECDSA; optional, the pure Python ecdsa computes the same signatures (much slower)
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+except ImportError:
+    ec = None
 
 # IMPORTANT : On utilise le provider py_ecc qu'on a créé
 import zk_sim as zk
 
+if ec is not None:
+    _OPENSSL_CURVES = {
+        "NIST192p": ec.SECP192R1, "NIST224p": ec.SECP224R1, "NIST256p": ec.SECP256R1,
+        "NIST384p": ec.SECP384R1, "NIST521p": ec.SECP521R1, "SECP256k1": ec.SECP256K1,
+    }
+    _ECDSA_SHA1 = ec.ECDSA(hashes.SHA1())  # hash function of ecdsa.SigningKey.sign() by default
+else:
+    _OPENSSL_CURVES = {}
+
+# Below this number of proofs per process, starting a process (and pickling the transactions) costs more than it
+# saves (see zk_sim._MIN_SHARD)
+_MIN_PROOFS_PER_WORKER = 8
+
+
 class IncompleteTransaction(Exception):
     pass
 
+
+class _OpenSSLVerifyingKey(object):
+    """
+    Same verify() as ecdsa.VerifyingKey (SHA1, signature = r || s in fixed-size big-endian), computed by OpenSSL.
+    """
+    def __init__(self, verifying_key):
+        curve = _OPENSSL_CURVES[verifying_key.curve.name]()
+        self._key = ec.EllipticCurvePublicKey.from_encoded_point(curve, verifying_key.to_string("uncompressed"))
+        self._baselen = verifying_key.curve.baselen
+
+    def verify(self, signature, data):
+        n = self._baselen
+        if len(signature) != 2 * n:
+            raise BadSignatureError("Invalid signature length")
+        der = encode_dss_signature(int.from_bytes(signature[:n], "big"), int.from_bytes(signature[n:], "big"))
+        try:
+            self._key.verify(der, data, _ECDSA_SHA1)
+        except InvalidSignature:
+            raise BadSignatureError("Signature verification failed")
+        return True
+
+
+def _sign(sk, data):
+    """
+    sk.sign(data), computed by OpenSSL when cryptography is installed and supports the curve.
+    :param sk: ecdsa.SigningKey
+    :return: bytes (r || s)
+    """
+    if sk.curve.name not in _OPENSSL_CURVES or sk.default_hashfunc is not hashlib.sha1:
+        return sk.sign(data)
+    key = ec.derive_private_key(sk.privkey.secret_multiplier, _OPENSSL_CURVES[sk.curve.name]())
+    r, s = decode_dss_signature(key.sign(data, _ECDSA_SHA1))
+    n = sk.curve.baselen
+    return r.to_bytes(n, "big") + s.to_bytes(n, "big")
+
+
+def _encode_vk(verifying_key):
+    """
+    Encoding of a public key in a transaction: "<curve name>:<compressed point (hex)>", e.g. "NIST256p:03ab...".
+    Transactions signed before this format store the hex of the PEM instead (no ":"), which is still accepted.
+    :return: str
+    """
+    return f"{verifying_key.curve.name}:{verifying_key.to_string('compressed').hex()}"
+
+
+@lru_cache(maxsize=4096)
+def _parse_vk(vk_hex):
+    """
+    Parse a public key (see _encode_vk()). Cached: an account signs many transactions with the same key.
+    Raise an exception if vk_hex is not a valid key.
+    :return: ecdsa.VerifyingKey
+    """
+    if ":" in vk_hex:
+        curve_name, point = vk_hex.split(":", 1)
+        return VerifyingKey.from_string(bytes.fromhex(point), curve=curve_by_name(curve_name))
+    return VerifyingKey.from_pem(bytes.fromhex(vk_hex))
+
+
+@lru_cache(maxsize=4096)
+def _load_vk(vk_hex):
+    """
+    Key used to check signatures made with vk_hex: backed by OpenSSL when possible, see _OpenSSLVerifyingKey.
+    Raise an exception if vk_hex is not a valid key.
+    :return: object with the verify(signature, data) method of ecdsa.VerifyingKey
+    """
+    vk = _parse_vk(vk_hex)
+    if vk.curve.name in _OPENSSL_CURVES:
+        return _OpenSSLVerifyingKey(vk)
+    return vk
+
+
+@lru_cache(maxsize=4096)
+def _author_from_vk(vk_hex):
+    """
+    Address of the owner of a public key: SHA256 of the hex of its PEM, whatever the encoding of vk_hex, so
+    addresses do not depend on how the key is stored in the transaction.
+    :return: str (hex)
+    """
+    if ":" in vk_hex:
+        vk_hex = _parse_vk(vk_hex).to_pem().hex()
+    return hashlib.sha256(vk_hex.encode()).hexdigest()
+
+
 class Transaction(object):
+    # No per-instance __dict__: a loaded chain holds one instance per transaction
+    __slots__ = ("receiver", "public_inputs", "date", "signature", "vk", "author", "zk_proof",
+                 "_payload_bytes", "_signed_bytes", "_tx_hash")
+
     def __init__(self,receiver=None, public_inputs=None, date=None, signature=None, vk=None, author=None, zk_proof=None):
         """
         Create a confidential transaction.
@@ -34,6 +149,23 @@ class Transaction(object):
         self.author = author
         self.zk_proof = zk_proof
 
+    def __setattr__(self, name, value):
+        """
+        The serialized transaction, its signed data and its hash are cached (see payload_bytes(),
+        get_data_to_sign() and hash()). Assigning any field invalidates them; if the public_inputs or zk_proof
+        dicts are modified in place, verify() notices it (see _refresh_signed_bytes()).
+        The caches themselves (names starting with "_") are stored as is, without invalidating each other.
+        """
+        if name[0] == "_":
+            object.__setattr__(self, name, value)
+            return
+        object.__setattr__(self, "_payload_bytes", None)
+        if name != "receiver":
+            object.__setattr__(self, "_tx_hash", None)
+            if name != "signature":
+                object.__setattr__(self, "_signed_bytes", None)
+        object.__setattr__(self, name, value)
+
     @property
     def data(self):
         """
@@ -50,11 +182,57 @@ class Transaction(object):
             "zk_proof": self.zk_proof
         }
 
+    @staticmethod
+    def from_data(data):
+        """
+        Rebuild a transaction from its data dictionary (see data). Called for every transaction of a loaded chain,
+        so the slots are filled directly (same defaults as __init__, caches empty) rather than through __init__
+        and __setattr__.
+        :param data: dict
+        :return: Transaction
+        """
+        transaction = Transaction.__new__(Transaction)
+        get = data.get
+        set_slot = object.__setattr__
+        public_inputs = get("public_inputs")
+        date = get("date")
+        set_slot(transaction, "receiver", get("receiver"))
+        set_slot(transaction, "public_inputs", public_inputs if public_inputs is not None else {})
+        set_slot(transaction, "date", utils.get_time() if date is None else date)
+        set_slot(transaction, "signature", get("signature"))
+        set_slot(transaction, "vk", get("vk"))
+        set_slot(transaction, "author", get("author"))
+        set_slot(transaction, "zk_proof", get("zk_proof"))
+        set_slot(transaction, "_payload_bytes", None)
+        set_slot(transaction, "_signed_bytes", None)
+        set_slot(transaction, "_tx_hash", None)
+        return transaction
+
+    def payload_bytes(self):
+        """
+        Canonical JSON (sorted keys) of data, as bytes. This is what block.py hashes for each transaction; it is
+        computed once and reused, e.g. when the same transaction is proposed in several candidate blocks.
+        :return: bytes
+        """
+        if self._payload_bytes is None:
+            self._payload_bytes = json.dumps(self.data, sort_keys=True).encode()
+        return self._payload_bytes
+
     def get_data_to_sign(self):
         """
         Helper to get exactly the data that needs to be signed.
         Must include the proof to prevent malleability.
+        Computed once and reused by sign() and hash() until a field is assigned; verify() always serializes again.
+        The encoding (json.dumps with sort_keys and the default separators) is part of the signature format: every
+        signature and transaction hash already on chain is computed over these exact bytes, so it must not change.
+        :return: bytes (UTF-8 JSON)
         """
+        if self._signed_bytes is None:
+            self._signed_bytes = self._serialize_signed()
+        return self._signed_bytes
+
+    def _serialize_signed(self):
+        """get_data_to_sign() from the current fields, without the cache."""
         d = {
             "public_inputs": self.public_inputs,
             "date": self.date,
@@ -62,27 +240,44 @@ class Transaction(object):
             "vk": self.vk,
             "zk_proof": self.zk_proof 
         }
-        # On trie les clés pour garantir que le string est toujours identique
-        return json.dumps(d, sort_keys=True)
+        # On trie les clés pour garantir que le string est toujours identique.
+        # Le tri est fait en C par l'encodeur json : écrire les clés déjà triées à la main (en vérifiant le schéma
+        # de public_inputs et zk_proof pour garder les mêmes octets) s'est révélé plus lent, et le résultat est
+        # de toute façon mis en cache.
+        return json.dumps(d, sort_keys=True).encode()
+
+    def _refresh_signed_bytes(self):
+        """
+        Serialize the signed data again, from the current fields. If public_inputs or zk_proof were modified in
+        place since the cache was filled, the stale caches (signed data, payload, hash) are replaced, so that
+        verify() checks the signature against the actual contents and hash() follows them (~13 µs, nothing next to
+        the ECDSA verification).
+        :return: bytes
+        """
+        signed_bytes = self._serialize_signed()
+        if signed_bytes != self._signed_bytes:
+            self._signed_bytes = signed_bytes
+            self._payload_bytes = None
+            self._tx_hash = None
+        return signed_bytes
 
     @staticmethod
     def author_from_sk(sk):
-        vk_hex = sk.verifying_key.to_pem().hex()
-        return hashlib.sha256(vk_hex.encode()).hexdigest()
+        return _author_from_vk(sk.verifying_key.to_pem().hex())
 
     def sign(self, sk):
         """
         Sign a transaction. 
         WARNING: All data (including zk_proof) must be set BEFORE calling this.
         """
-        self.vk = sk.verifying_key.to_pem().hex()
-        self.author = hashlib.sha256(self.vk.encode()).hexdigest()
+        self.vk = _encode_vk(sk.verifying_key)
+        self.author = _author_from_vk(self.vk)
         
-        # On récupère la string JSON exacte
-        data_string = self.get_data_to_sign()
+        # On récupère les octets JSON exacts
+        data_bytes = self.get_data_to_sign()
         
         # On signe
-        self.signature = sk.sign(data_string.encode()).hex()
+        self.signature = _sign(sk, data_bytes).hex()
 
     def verify(self):
         """
@@ -90,27 +285,40 @@ class Transaction(object):
         1. Verify the ECDSA signature (Identity)
         2. Verify the zk-SNARK proof (Validity of funds)
         """
+        return self._verify_signature() and self._verify_proof()
+
+    def _verify_signature(self):
+        """
+        ECDSA part of verify(): the signature matches the signed data and the author is derived from the key.
+        Cheap compared to _verify_proof(), so batches check it first (see verify_batch()).
+        """
         # 1. Verification de base
         if self.vk is None or self.signature is None:
             return False
-        
+        try:
+            vk_obj = _load_vk(self.vk)
+        except Exception:
+            return False
+
+        # Vérification que l'auteur correspond bien à la clé : l'adresse dérivée est en cache (une par clé), la
+        # comparaison est donc faite avant la vérification ECDSA, bien plus coûteuse
+        if self.author != _author_from_vk(self.vk):
+            return False
+
         # 2. Vérification ECDSA (Signature)
         try:
-            vk_obj = VerifyingKey.from_pem(bytes.fromhex(self.vk))
-            # On vérifie exactement les mêmes données que lors de la signature
-            data_string = self.get_data_to_sign()
-            
-            vk_obj.verify(bytes.fromhex(self.signature), data_string.encode())
-            
-            # Vérification que l'auteur correspond bien à la clé
-            derived_author = hashlib.sha256(self.vk.encode()).hexdigest()
-            if self.author != derived_author:
-                return False
-                
+            # On vérifie les données actuelles de la transaction, pas le cache : une modification en place des
+            # dicts public_inputs ou zk_proof doit invalider la signature
+            vk_obj.verify(bytes.fromhex(self.signature), self._refresh_signed_bytes())
         except BadSignatureError:
             print("ERREUR: Signature ECDSA invalide.")
             return False
-        
+        return True
+
+    def _verify_proof(self):
+        """
+        Zero-knowledge part of verify(): the proof matches the current balance commitment h_old.
+        """
         # 3. Vérification ZK-SNARK
         # On vérifie que le prouveur possède le secret du SOLDE ACTUEL (h_old)
         # C'est la condition pour avoir le droit de dépenser.
@@ -139,21 +347,52 @@ class Transaction(object):
         return self.date < other.date
 
     def hash(self):
+        """
+        Identifier of the transaction (mempool key, duplicate detection): SHA256 of the signed data and the
+        signature. Cached until a field other than receiver is assigned.
+        :return: str (hex)
+        """
+        if self._tx_hash is not None:
+            return self._tx_hash
         if self.signature is None:
             raise IncompleteTransaction("No signature")
         # Le hash de la transaction inclut la signature
-        full_data = self.get_data_to_sign() + self.signature
-        return hashlib.sha256(full_data.encode()).hexdigest()
+        full_data = self.get_data_to_sign() + self.signature.encode()
+        self._tx_hash = hashlib.sha256(full_data).hexdigest()
+        return self._tx_hash
 
     @staticmethod
-    def log(transactions):
+    def log(transactions, n_workers=None):
+        """
+        Print the transactions, sorted by date, with their validity. As in verify_batch(), all the signatures are
+        checked first; only the transactions with a valid signature get their zero-knowledge proof checked, and
+        these independent proof verifications are spread over a pool of processes when there are enough of them
+        (at least _MIN_PROOFS_PER_WORKER per process).
+        Nothing is verified nor printed when config.verbose is False.
+        :param n_workers: number of processes (default: os.cpu_count(); 1 stays in-process)
+        """
+        if not config.verbose:
+            return
         table = Table(title="Mempool / Block Transactions")
         table.add_column("Hash", style="cyan")
         table.add_column("Author", style="green")
         table.add_column("Valid?", style="magenta")
 
-        for t in sorted(transactions):
-            is_valid = t.verify() # Attention, c'est lourd à calculer pour des logs
+        transactions = sorted(transactions, key=attrgetter("date"))
+        results = [t._verify_signature() for t in transactions]
+        signed = [t for t, ok in zip(transactions, results) if ok]
+        # Attention, c'est lourd à calculer pour des logs
+        n_workers = min(n_workers or os.cpu_count() or 1, len(signed) // _MIN_PROOFS_PER_WORKER)
+        if n_workers <= 1:
+            proofs = [t._verify_proof() for t in signed]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                proofs = list(executor.map(Transaction._verify_proof, signed,
+                                           chunksize=max(1, len(signed) // n_workers)))
+        proofs = iter(proofs)
+        results = [ok and next(proofs) for ok in results]
+
+        for t, is_valid in zip(transactions, results):
             table.add_row(
                 t.hash()[:10] + "...",
                 t.author[:10] + "...",
@@ -163,6 +402,28 @@ class Transaction(object):
         console.print(table)
 
 
+def verify_batch(transactions, n_workers=1):
+    """
+    Verify a list of transactions (e.g. the content of a block). Same result as all(t.verify() for t in
+    transactions), but every ECDSA signature is checked before the
+    first zero-knowledge proof, which is by far the most expensive step: a forged transaction is rejected
+    without paying for the proofs. The proofs are then checked together by zk.verify_zk_batch(); only if that
+    fails are they re-checked one by one, to report the invalid one.
+    :param n_workers: number of processes for the proofs (see zk.verify_batch(); 1 stays in-process)
+    :return: True or False
+    """
+    if not all(t._verify_signature() for t in transactions):
+        return False
+    if any(t.zk_proof is None or "h_old" not in t.public_inputs for t in transactions):
+        return all(t._verify_proof() for t in transactions)
+    try:
+        if zk.verify_zk_batch([(t.public_inputs["h_old"], t.zk_proof) for t in transactions], n_workers):
+            return True
+    except Exception:
+        pass
+    return all(t._verify_proof() for t in transactions)
+
+
 # --- TESTS CORRIGÉS ---
 
 def test1():
@@ -208,5 +469,33 @@ def test1():
     else:
         print(">> ÉCHEC : Transaction rejetée.")
 
+def test2():
+    print("\n--- TEST 2 : Caches (payload_bytes, get_data_to_sign, hash) ---")
+    from ecdsa import SigningKey, NIST384p
+    sk = SigningKey.generate(curve=NIST384p)
+    secret_balance, secret_nonce = 50, 12345
+    t = Transaction(public_inputs={"h_old": zk.commit(secret_balance, secret_nonce)},
+                    zk_proof=zk.prove(secret_balance, secret_nonce))
+    t.sign(sk)
+
+    # Calculer un cache ne doit pas effacer les autres
+    t.hash()
+    assert t.verify()
+    t.payload_bytes()
+    assert None not in (t._payload_bytes, t._signed_bytes, t._tx_hash), "cache effacé"
+    tx_hash, signed_bytes = t._tx_hash, t._signed_bytes
+
+    # receiver ne fait partie ni des données signées ni du hash : seul _payload_bytes est invalidé
+    t.receiver = "bob"
+    assert t._payload_bytes is None
+    assert t._tx_hash is tx_hash and t._signed_bytes is signed_bytes
+
+    # Une modification en place des données signées invalide la signature, malgré les caches
+    t.public_inputs["h_new"] = zk.commit(secret_balance + 1000, secret_nonce)
+    assert not t.verify(), "modification non détectée"
+    assert t.hash() != tx_hash
+    print(">> SUCCÈS : les caches tiennent, et ne masquent pas une modification.")
+
 if __name__ == "__main__":
-    test1()
\ No newline at end of file
+    test1()
+    test2()
\ No newline at end of file
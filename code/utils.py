@@ -1,4 +1,7 @@
+from contextlib import nullcontext
 from datetime import datetime
+from rich.console import Console
+import config
 
 
 def get_time():
@@ -16,3 +19,25 @@ def str_to_time(s):
     :return:
     """
     return datetime.strptime(s, "%Y-%m-%d %H:%M:%S.%f")
+
+
+class QuietConsole(object):
+    """
+    Stand-in for rich.console.Console when config.verbose is False: nothing is rendered nor printed.
+    """
+    def print(self, *objects, **kwargs):
+        pass
+
+    def clear(self):
+        pass
+
+    def status(self, *args, **kwargs):
+        return nullcontext()
+
+
+def get_console():
+    """
+    Console for the rich output (logs, demos), see config.verbose.
+    :return: Console or QuietConsole
+    """
+    return Console() if config.verbose else QuietConsole()
@@ -1,11 +1,9 @@
 import time
 import random
-from rich.console import Console
 from rich.panel import Panel
 from rich.layout import Layout
 from rich.table import Table
 from rich.tree import Tree
-from rich import print as rprint
 from rich.align import Align
 
 # Importation de vos modules
@@ -14,13 +12,25 @@ import zk_sim as zk
 from transaction import Transaction
 from blockchain import Blockchain
 import hashlib
+import config
+import utils
 
-console = Console()
+# ZK_VERBOSE=0 : ni rendu, ni pauses, ni attente de l'utilisateur (pour chronométrer le scénario)
+console = utils.get_console()
+rprint = console.print
+
+def pause(seconds):
+    if config.verbose:
+        time.sleep(seconds)
+
+def wait(prompt):
+    if config.verbose:
+        input(prompt)
 
 def step_header(title, step_num):
     console.print(f"\n[bold yellow]ÉTAPE {step_num} : {title}[/bold yellow]")
     console.print("[dim]" + "-" * 50 + "[/dim]")
-    time.sleep(1)
+    pause(1)
 
 def main():
     console.clear()
@@ -69,7 +79,7 @@ def main():
     )
     console.print(table)
     
-    input("\n[Appuyez sur Entrée pour construire la transaction...]")
+    wait("\n[Appuyez sur Entrée pour construire la transaction...]")
 
 
     # =========================================================================
@@ -97,7 +107,7 @@ def main():
     
     # Preuve
     with console.status("[bold green]Génération de la Preuve ZK-SNARK...[/bold green]"):
-        time.sleep(1.5) # Simulation temps de calcul
+        pause(1.5) # Simulation temps de calcul
         proof = zk.prove(alice_secret_bal, alice_secret_nonce)
     
     console.print(Panel(
@@ -109,7 +119,7 @@ def main():
         border_style="green"
     ))
     
-    input("\n[Appuyez sur Entrée pour envoyer au réseau...]")
+    wait("\n[Appuyez sur Entrée pour envoyer au réseau...]")
 
 
     # =========================================================================
@@ -145,7 +155,7 @@ def main():
     console.print(Align.center(tx_tree))
     rprint("[italic]Notez qu'aucun montant en clair n'est visible ici ![/italic]")
 
-    input("\n[Appuyez sur Entrée pour vérifier la transaction...]")
+    wait("\n[Appuyez sur Entrée pour vérifier la transaction...]")
 
 
     # =========================================================================
@@ -159,7 +169,7 @@ def main():
     bc.state_hashes[addr_bob] = comm_bob
 
     with console.status("[bold red]Vérification en cours par les nœuds...[/bold red]"):
-        time.sleep(1)
+        pause(1)
         
         # 1. Signature
         check_sig = "✅ Signature Valide (C'est bien Alice)"
@@ -178,7 +188,7 @@ def main():
         border_style="red"
     ))
 
-    input("\n[Appuyez sur Entrée pour miner et mettre à jour...]")
+    wait("\n[Appuyez sur Entrée pour miner et mettre à jour...]")
 
 
     # =========================================================================
@@ -211,7 +221,7 @@ def main():
     
     rprint(f"   Nouveau Hash    : {final_bob_hash[:15]}...")
 
-    input("\n[Appuyez sur Entrée pour voir le résultat final...]")
+    wait("\n[Appuyez sur Entrée pour voir le résultat final...]")
 
     # =========================================================================
     # ÉTAPE 6 : RÉSULTAT FINAL
@@ -5,15 +5,27 @@ Implémente : Pedersen Commitments & Preuves de connaissance (Schnorr).
 """
 import hashlib
 import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 try:
-    import py_ecc.bn128 as _bn
+    # optimized_bn128 : même courbe que py_ecc.bn128, mais en coordonnées projectives (x, y, z), ce qui évite une
+    # inversion modulaire par addition/doublement. Les points sérialisés (affines) sont identiques.
+    import py_ecc.optimized_bn128 as _bn
     # core primitives
     G1 = _bn.G1
     multiply = _bn.multiply
     add = _bn.add
+    double = _bn.double
     curve_order = _bn.curve_order
     eq = _bn.eq
+    is_inf = _bn.is_inf
     FQ = _bn.FQ
+    normalize = _bn.normalize
+    INFINITY = _bn.Z1
+    is_on_curve = _bn.is_on_curve
+    FIELD_MODULUS = _bn.field_modulus
     PYECC_AVAILABLE = True
 except Exception:
     # Fallback: if py_ecc is not available, we will use SHA256-based simulation
@@ -23,14 +35,133 @@ except Exception:
 
 if PYECC_AVAILABLE:
     G = G1
-    # H is a second generator derived deterministically from G
-    H = multiply(G, 1234567890123456789)
+    # H is a second generator derived deterministically from G: H = multiply(G, 1234567890123456789).
+    # Sa forme affine est écrite ici pour ne pas refaire la multiplication à chaque import ; à z == 1 comme G, ses
+    # coordonnées affines (Fiat-Shamir) ne coûtent rien.
+    _H_HEX = ("86952683bdfdbeeb1ccc740376742c2323d1424179e9e401ed759fe5a5413a7:"
+              "1f6071d65c062309441b2f61078de60d767b2b60a35b060e21d60c97d1140d41")
+    H = tuple(FQ(int(c, 16)) for c in _H_HEX.split(":")) + (FQ.one(),)
     ORDER = curve_order
 else:
     G = None
     H = None
     ORDER = 2 ** 256
 
+# --- MULTIPLICATIONS À BASE FIXE (G, H) ---
+# Tables : table[i][b] = (b + 1) * 2^(4i) * P. Un scalaire de 256 bits coûte alors au plus 64 additions, au lieu de
+# 256 doublements et ~128 additions. Construites au premier usage (~1000 additions par base).
+_WINDOW = 4
+_FIXED_TABLES = {}
+
+
+def _fixed_base_table(point):
+    """Table de précalcul de point pour _fixed_mul()"""
+    table = []
+    base = point
+    for _ in range(256 // _WINDOW):
+        row = [base]
+        for _ in range((1 << _WINDOW) - 2):
+            row.append(add(row[-1], base))
+        table.append(row)
+        base = add(row[-1], base)  # 2^w * base
+    return table
+
+
+def _fixed_mul(name, point, scalar):
+    """scalar * point pour un point fixe (G ou H), via sa table de précalcul."""
+    table = _FIXED_TABLES.get(name)
+    if table is None:
+        table = _FIXED_TABLES[name] = _fixed_base_table(point)
+    scalar %= ORDER
+    mask = (1 << _WINDOW) - 1
+    acc = INFINITY
+    _add = add  # variable locale : LOAD_FAST dans la boucle au lieu d'une recherche dans les globales
+    for row in table:
+        if not scalar:
+            break
+        digit = scalar & mask
+        if digit:
+            acc = _add(acc, row[digit - 1])
+        scalar >>= _WINDOW
+    return acc
+
+
+def _mul_G(scalar):
+    """scalar * G"""
+    return _fixed_mul("G", G, scalar)
+
+
+def _mul_H(scalar):
+    """scalar * H"""
+    return _fixed_mul("H", H, scalar)
+
+
+# Points variables (commitments, T) : chiffres signés wNAF de largeur 5, impairs dans [-15, 15], dont ~1 sur 6 est non
+# nul ; un négatif coûte une négation de y. Table par point : [P, 3P, ..., 15P], 1 doublement et 7 additions.
+_WNAF_WINDOW = 5
+
+
+def _wnaf(k, w=_WNAF_WINDOW):
+    """Chiffres wNAF de k > 0, bit de poids faible en premier : k == sum(d * 2^i)."""
+    digits = []
+    full = 1 << w
+    half = full >> 1
+    while k:
+        if k & 1:
+            d = k & (full - 1)
+            if d >= half:
+                d -= full
+            k -= d
+        else:
+            d = 0
+        digits.append(d)
+        k >>= 1
+    return digits
+
+
+def _msm(terms):
+    """
+    Multi-multiplication : somme des s * P pour (P, s) dans terms.
+    G et H passent par leurs tables fixes (additions seulement). Les autres points sont traités ensemble par la
+    méthode de Straus : un doublement par bit, partagé entre tous les points, puis une addition par chiffre wNAF non
+    nul de chaque point (~43 pour un scalaire de 254 bits, contre ~60 en fenêtres de 4 bits non signées).
+    """
+    acc = INFINITY
+    variable = []
+    for point, scalar in terms:
+        if point is G:
+            acc = add(acc, _mul_G(scalar))
+        elif point is H:
+            acc = add(acc, _mul_H(scalar))
+        else:
+            scalar %= ORDER
+            if scalar:
+                variable.append((point, scalar))
+    if not variable:
+        return acc
+
+    tables = []
+    for point, scalar in variable:
+        two = double(point)
+        row = [point]
+        for _ in range((1 << (_WNAF_WINDOW - 2)) - 1):
+            row.append(add(row[-1], two))
+        neg = [(x, -y, z) for x, y, z in row]
+        tables.append((_wnaf(scalar), row, neg))
+    straus = INFINITY
+    _add, _double = add, double  # variables locales pour la boucle (LOAD_FAST)
+    for i in range(max(len(digits) for digits, _, _ in tables) - 1, -1, -1):
+        straus = _double(straus)
+        for digits, row, neg in tables:
+            if i < len(digits):
+                d = digits[i]
+                if d > 0:
+                    straus = _add(straus, row[d >> 1])
+                elif d < 0:
+                    straus = _add(straus, neg[(-d) >> 1])
+    return add(acc, straus)
+
+
 def _coerce_to_int(x):
     """Coerce various input types to an integer modulo ORDER.
 
@@ -38,46 +169,87 @@ def _coerce_to_int(x):
     """
     if isinstance(x, int):
         return x % ORDER
-    if isinstance(x, bytes):
-        try:
-            return int.from_bytes(x, 'big') % ORDER
-        except Exception:
-            return int(hashlib.sha256(x).hexdigest(), 16) % ORDER
-    if isinstance(x, str):
-        try:
-            return int(x, 0) % ORDER
-        except Exception:
-            return int(hashlib.sha256(x.encode()).hexdigest(), 16) % ORDER
+    if isinstance(x, (bytes, str)):
+        return _coerce_cached(x)
     return int(hashlib.sha256(str(x).encode()).hexdigest(), 16) % ORDER
 
-def _to_bytes(n):
-    """Utilitaire pour convertir entier -> bytes pour le hachage"""
-    return n.to_bytes(32, 'big')
-
-def _hash_points(*args):
-    """Hash cryptographique de plusieurs points ou entiers (Fiat-Shamir)"""
-    hasher = hashlib.sha256()
-    for arg in args:
-        if hasattr(arg, '__iter__'): # C'est un point (x, y)
-            # serialize point deterministically
-            hasher.update(serialize_point(arg).encode())
-        elif isinstance(arg, int):
-            hasher.update(_to_bytes(arg))
+
+@lru_cache(maxsize=4096)
+def _coerce_cached(x):
+    """_coerce_to_int() pour bytes et str, en cache : prove() et verify() reçoivent souvent les mêmes secrets."""
+    if isinstance(x, bytes):
+        return int.from_bytes(x, 'big') % ORDER
+    # Entier décimal sans zéro initial : int(x) donne le même résultat que int(x, 0), sans passer par l'exception
+    if x.isascii() and x.isdigit() and (x[0] != "0" or len(x) == 1):
+        return int(x) % ORDER
+    try:
+        return int(x, 0) % ORDER
+    except Exception:
+        return int(hashlib.sha256(x.encode()).hexdigest(), 16) % ORDER
+
+
+def coerce_many(values):
+    """_coerce_to_int() de chaque valeur (liste d'entiers)."""
+    return [_coerce_to_int(x) for x in values]
+
+
+def _affine_many(points):
+    """Coordonnées affines entières (x, y) de plusieurs points, avec une seule inversion modulaire pour tous
+    (astuce de Montgomery : on inverse le produit des z, puis on en déduit chaque 1/z par deux multiplications ; affine = (x/z, y/z)).
+
+    Une inversion coûte des centaines de multiplications ; les points déjà affines (2-uplets, ou z == 1, comme ceux
+    de deserialize_point()) n'en demandent aucune. Le point à l'infini (z == 0) donne (0, 0), comme normalize().
+    """
+    zs = [int(point[2]) if len(point) == 3 else 1 for point in points]
+    # prefix[i] = produit des z (différents de 0 et 1) des points d'indice < i
+    prefix = []
+    acc = 1
+    for z in zs:
+        prefix.append(acc)
+        if z > 1:
+            acc = acc * z % FIELD_MODULUS
+    inv = pow(acc, -1, FIELD_MODULUS) if acc != 1 else 1
+    out = [None] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        point, z = points[i], zs[i]
+        if z == 1:
+            out[i] = (int(point[0]), int(point[1]))
+        elif z == 0:
+            out[i] = (0, 0)
         else:
-            hasher.update(str(arg).encode())
-    return int(hasher.hexdigest(), 16) % ORDER
+            z_inv = inv * prefix[i] % FIELD_MODULUS
+            inv = inv * z % FIELD_MODULUS
+            out[i] = (int(point[0]) * z_inv % FIELD_MODULUS, int(point[1]) * z_inv % FIELD_MODULUS)
+    return out
 
 
 def serialize_point(point):
     """Serialize an EC point to a hex string 'x:y' in affine coords."""
     if not PYECC_AVAILABLE:
         raise RuntimeError("py_ecc not available")
-    ax, ay = normalize_point(point)
-    x = int(ax)
-    y = int(ay)
+    (x, y), = _affine_many((point,))
     return f"{x:x}:{y:x}"
 
 
+def serialize_points(points):
+    """serialize_point() de plusieurs points, avec une seule inversion modulaire pour tous."""
+    if not PYECC_AVAILABLE:
+        raise RuntimeError("py_ecc not available")
+    return [f"{x:x}:{y:x}" for x, y in _affine_many(points)]
+
+
+# Préfixe constant du challenge de Fiat-Shamir : G et H sérialisés en "x:y" hexadécimal
+_FS_PREFIX = (serialize_point(G) + serialize_point(H)).encode() if PYECC_AVAILABLE else b""
+
+
+def _fs_challenge(commitment_point, T):
+    """Challenge de Fiat-Shamir : SHA256 de G, H, C et T en "x:y" hexadécimal, concaténés, modulo ORDER.
+    Ces octets ne doivent pas changer, sinon les preuves déjà émises ne seraient plus valides. Ceux de G et H sont
+    précalculés, et C et T sont ramenés en affine ensemble."""
+    (cx, cy), (tx, ty) = _affine_many((commitment_point, T))
+    return int.from_bytes(hashlib.sha256(_FS_PREFIX + b"%x:%x%x:%x" % (cx, cy, tx, ty)).digest(), 'big') % ORDER
+
+
 def deserialize_point(s):
     """Deserialize a point serialized with serialize_point."""
     if not PYECC_AVAILABLE:
@@ -85,8 +257,15 @@ def deserialize_point(s):
     x_hex, y_hex = s.split(":")
     x = FQ(int(x_hex, 16))
     y = FQ(int(y_hex, 16))
-    # Return affine point (x, y) as expected by py_ecc arithmetic
-    return (x, y)
+    # Return Jacobian point (x, y, 1) as expected by py_ecc.optimized_bn128 arithmetic
+    return (x, y, FQ.one())
+
+
+@lru_cache(maxsize=4096)
+def _parse_point(s):
+    """deserialize_point() en cache, pour les commitments : les soldes de state_hashes reviennent à chaque
+    transaction et à chaque addition (les points py_ecc sont des tuples et ne sont jamais modifiés)."""
+    return deserialize_point(s)
 
 
 def normalize_point(point):
@@ -99,21 +278,16 @@ def normalize_point(point):
     # affine point
     if len(point) == 2:
         return point[0], point[1]
-    # Jacobian/projective point (x, y, z)
-    x, y, z = point
-    try:
-        # FQ objects support inversion
-        z_inv = z.inv()
-        return x * z_inv, y * z_inv
-    except Exception:
-        # z may be integer 1
-        if z == 1:
-            return x, y
-        # fallback: return as-is (best-effort)
-        return x, y
+    # projective point (x, y, z) of optimized_bn128: affine (x / z, y / z)
+    return normalize(point)
 
 # --- FONCTIONS PUBLIQUES (API) ---
 
+def _commit_int(v, r):
+    """commit_point() pour des entiers déjà réduits (sans _coerce_to_int())."""
+    return _msm(((G, v), (H, r)))
+
+
 def commit(value, blinding_factor):
     """
     Crée un Pedersen Commitment (Le coffre-fort public).
@@ -124,9 +298,7 @@ def commit(value, blinding_factor):
     r = _coerce_to_int(blinding_factor)
     
     # Mathématiques de courbe elliptique : v*G + r*H
-    term1 = multiply(G, v)
-    term2 = multiply(H, r)
-    commitment = add(term1, term2)
+    commitment = _commit_int(v, r)
     # return serialized form
     return serialize_point(commitment)
 
@@ -135,9 +307,17 @@ def commit_point(value, blinding_factor):
     """Return raw EC point (internal use)."""
     v = _coerce_to_int(value)
     r = _coerce_to_int(blinding_factor)
-    term1 = multiply(G, v)
-    term2 = multiply(H, r)
-    return add(term1, term2)
+    return _commit_int(v, r)
+
+
+def commit_many(values, blinding_factors):
+    """
+    commit() de plusieurs couples (value, blinding_factor) : même résultat que
+    [commit(v, r) for v, r in zip(values, blinding_factors)], mais tous les points sont sérialisés avec une seule
+    inversion modulaire (voir serialize_points()), qui coûtait plus que les multiplications à base fixe elles-mêmes.
+    """
+    points = [_commit_int(v, r) for v, r in zip(coerce_many(values), coerce_many(blinding_factors))]
+    return serialize_points(points)
 
 def add_commitments(comm1_hex, comm2_hex):
     """
@@ -148,82 +328,209 @@ def add_commitments(comm1_hex, comm2_hex):
         # Simulation simpliste si pas de py_ecc (Juste pour éviter le crash)
         return hashlib.sha256((comm1_hex + comm2_hex).encode()).hexdigest()
 
-    # 1. Désérialiser les strings hex en Objets Points
-    p1 = deserialize_point(comm1_hex)
-    p2 = deserialize_point(comm2_hex)
-    
-    # 2. Additionner les points (Maths Elliptiques)
-    sum_point = add(p1, p2)
-    
-    # 3. Renvoyer en string hex
-    return serialize_point(sum_point)
+    # 1. Désérialiser les strings hex en Objets Points (en cache), 2. les additionner, 3. renvoyer en string hex
+    return serialize_point(add_commitments_points(_parse_point(comm1_hex), _parse_point(comm2_hex)))
 
-def prove_knowledge(commitment, value, blinding_factor):
+
+def add_commitments_points(p1, p2):
     """
-    Génère une preuve ZK (Schnorr Proof).
-    Prouve qu'on connait v et r tels que C = vG + rH, sans révéler v ni r.
+    add_commitments() sur des points : pour additionner beaucoup de commitments, ne sérialiser qu'à la fin,
+    e.g. serialize_point(functools.reduce(add_commitments_points, points)).
+    """
+    return add(p1, p2)
+
+# Forme interne d'une preuve : points bruts (T, C) et entiers (s_v, s_r). Les dicts de chaînes hexadécimales
+# (proof_to_dict()) ne servent qu'aux frontières JSON : transaction signée, blockchain.json.
+Proof = namedtuple("Proof", "T s_v s_r C")
+
+
+def prove_knowledge_internal(commitment_point, v, r):
+    """
+    prove_knowledge() sans sérialisation : v et r entiers, commitment_point un point, et la preuve renvoyée est un
+    Proof. T et C y sont déjà ramenés à z == 1 (une seule inversion pour les deux), donc les hacher, les sérialiser
+    (proof_to_dict()) ou les vérifier (verify_internal()) ne coûte plus d'inversion.
     """
     # 1. Préparation (Nombres aléatoires temporaires)
-    # Dans un vrai système, utilisez os.urandom. Ici fixe pour débug ou random simple.
-    import random
-    t_v = random.randint(1, ORDER - 1)
-    t_r = random.randint(1, ORDER - 1)
+    # Aléa cryptographique (os.urandom) : des nonces prévisibles permettraient de retrouver v et r à partir de la
+    # preuve. 64 octets par nonce, pour que la réduction modulo ORDER (~2^254) n'introduise pas de biais.
+    raw = os.urandom(128)
+    t_v = int.from_bytes(raw[:64], 'big') % ORDER
+    t_r = int.from_bytes(raw[64:], 'big') % ORDER
     
     # 2. Calcul de l'engagement temporaire T = t_v*G + t_r*H
-    T = add(multiply(G, t_v), multiply(H, t_r))
+    T = _msm(((G, t_v), (H, t_r)))
+    (cx, cy), (tx, ty) = _affine_many((commitment_point, T))
+    commitment_point = (FQ(cx), FQ(cy), FQ.one())
+    T = (FQ(tx), FQ(ty), FQ.one())
     
     # 3. Calcul du "Challenge" (c) via Fiat-Shamir Heuristic
     # Le challenge dépend du commitment public et de l'engagement temporaire
-    # Accept commitment as serialized or as a point
-    if isinstance(commitment, str):
-        commitment_point = deserialize_point(commitment)
-    else:
-        commitment_point = commitment
-    challenge = _hash_points(G, H, commitment_point, T)
+    challenge = _fs_challenge(commitment_point, T)
     
     # 4. Calcul des réponses (s_v, s_r) pour masquer les secrets
     # s = t + c * secret (modulo ORDER)
-    v_int = _coerce_to_int(value)
-    r_int = _coerce_to_int(blinding_factor)
-    s_v = (t_v + challenge * v_int) % ORDER
-    s_r = (t_r + challenge * r_int) % ORDER
+    # % reste plus rapide qu'une réduction de Barrett écrite en Python (deux multiplications de 512 bits, un décalage
+    # et une comparaison, ~40 % plus lent mesuré), et ces deux réductions ne pèsent rien à côté de _msm().
+    s_v = (t_v + challenge * v) % ORDER
+    s_r = (t_r + challenge * r) % ORDER
 
-    # La preuve est l'ensemble (T, s_v, s_r) — on renvoie des valeurs sérialisées
+    return Proof(T, s_v, s_r, commitment_point)
+
+
+def proof_to_dict(proof):
+    """Forme JSON d'un Proof : {"T": "x:y", "s_v": hex, "s_r": hex, "C": "x:y"}."""
+    T_hex, C_hex = serialize_points((proof.T, proof.C))
     return {
-        "T": serialize_point(T),
-        "s_v": format(s_v, 'x'),
-        "s_r": format(s_r, 'x'),
-        "C": serialize_point(commitment_point)
+        "T": T_hex,
+        # Scalaires en hexadécimal sur 32 octets (64 caractères) : taille fixe, et to_bytes().hex() est plus rapide
+        # que format(). int(x, 16) les relit, comme les anciennes preuves de longueur variable.
+        "s_v": proof.s_v.to_bytes(32, 'big').hex(),
+        "s_r": proof.s_r.to_bytes(32, 'big').hex(),
+        "C": C_hex
     }
 
+
+def proof_from_dict(proof):
+    """
+    Proof d'une preuve sous forme JSON (proof_to_dict()). Les champs peuvent aussi être déjà des points ou des
+    entiers ; "C" est facultatif (None s'il manque).
+    """
+    T, s_v, s_r, C = proof.get("T"), proof.get("s_v"), proof.get("s_r"), proof.get("C")
+    if isinstance(T, str) and isinstance(s_v, str) and isinstance(s_r, str):
+        T, s_v, s_r = _parse_proof_fields(T, s_v, s_r)
+    else:
+        T = deserialize_point(T) if isinstance(T, str) else T
+        s_v = int(s_v, 16) if isinstance(s_v, str) else int(s_v)
+        s_r = int(s_r, 16) if isinstance(s_r, str) else int(s_r)
+    C = _parse_point(C) if isinstance(C, str) else C
+    return Proof(T, s_v, s_r, C)
+
+
+@lru_cache(maxsize=4096)
+def _parse_proof_fields(T_hex, s_v_hex, s_r_hex):
+    """T, s_v et s_r désérialisés, en cache : une transaction est revérifiée à chaque validity() et merge()."""
+    return deserialize_point(T_hex), int(s_v_hex, 16), int(s_r_hex, 16)
+
+
+def prove_knowledge(commitment, value, blinding_factor):
+    """
+    Génère une preuve ZK (Schnorr Proof).
+    Prouve qu'on connait v et r tels que C = vG + rH, sans révéler v ni r.
+    """
+    # Accept commitment as serialized or as a point
+    if isinstance(commitment, str):
+        commitment_point = _parse_point(commitment)
+    else:
+        commitment_point = commitment
+    proof = prove_knowledge_internal(commitment_point, _coerce_to_int(value), _coerce_to_int(blinding_factor))
+
+    # La preuve est l'ensemble (T, s_v, s_r) — on renvoie des valeurs sérialisées
+    return proof_to_dict(proof)
+
+def _parse_proof(commitment, proof):
+    """Désérialise une preuve (Proof ou forme JSON) et recalcule son challenge.
+    Lève ValueError si T ou le commitment n'est pas sur la courbe : verify() et verify_batch() rejettent ainsi les
+    mêmes preuves, et la loi de groupe n'est jamais appliquée à des points quelconques.
+
+    :return: (commitment_point, T, s_v, s_r, challenge)
+    """
+    # Deserialize proof fields (they are serialized for JSON friendliness)
+    if not isinstance(proof, Proof):
+        proof = proof_from_dict(proof)
+    T, s_v, s_r = proof.T, proof.s_v, proof.s_r
+
+    commitment_point = _parse_point(commitment) if isinstance(commitment, str) else commitment
+    if not (is_on_curve(T, _bn.b) and is_on_curve(commitment_point, _bn.b)):
+        raise ValueError("point hors de la courbe")
+
+    # 1. Recalculate the challenge
+    challenge = _fs_challenge(commitment_point, T)
+    return commitment_point, T, s_v, s_r, challenge
+
+
+def verify_internal(commitment_point, proof):
+    """
+    verify() pour un Proof de prove_internal() ou prove_knowledge_internal() (les formes sérialisées sont aussi
+    acceptées). Le commitment vérifié est commitment_point, jamais le champ C de la preuve.
+    Aucune inversion : tout reste en coordonnées projectives.
+    """
+    commitment_point, T, s_v, s_r, challenge = _parse_proof(commitment_point, proof)
+
+    # 2. Check: s_v*G + s_r*H == T + c*Commitment, en une seule équation s_v*G + s_r*H - c*C - T == O.
+    # Opposé d'un point = y changé de signe : -c*C coûte autant que c*C, et T n'est qu'ajouté (pas de table wNAF).
+    x, y, z = commitment_point
+    total = _msm(((G, s_v), (H, s_r), ((x, -y, z), challenge)))
+    x, y, z = T
+    return is_inf(add(total, (x, -y, z)))
+
+
 def verify(commitment, proof):
     """
     Vérifie la preuve ZK.
     """
     try:
-        # Deserialize proof fields (they are serialized for JSON friendliness)
-        T_ser = proof.get("T")
-        s_v_ser = proof.get("s_v")
-        s_r_ser = proof.get("s_r")
+        return verify_internal(commitment, proof)
+    except Exception as e:
+        print(f"Erreur de vérification: {e}")
+        return False
+
 
-        T = deserialize_point(T_ser) if isinstance(T_ser, str) else T_ser
-        s_v = int(s_v_ser, 16) if isinstance(s_v_ser, str) else int(s_v_ser)
-        s_r = int(s_r_ser, 16) if isinstance(s_r_ser, str) else int(s_r_ser)
+# En dessous de ce nombre de preuves par processus, démarrer un processus coûte plus que ce qu'il fait gagner
+_MIN_SHARD = 8
 
-        commitment_point = deserialize_point(commitment) if isinstance(commitment, str) else commitment
 
-        # 1. Recalculate the challenge
-        challenge = _hash_points(G, H, commitment_point, T)
+def verify_batch(pairs, n_workers=1):
+    """
+    Vérifie plusieurs preuves ZK d'un coup : True si et seulement si (à une probabilité négligeable près) toutes
+    sont valides, comme all(verify(c, p) for c, p in pairs).
+
+    Combinaison linéaire aléatoire des équations s_v*G + s_r*H == T + c*C, avec des coefficients rho secrets de
+    128 bits :  (somme rho*s_v)*G + (somme rho*s_r)*H - somme rho*T - somme (rho*c)*C == O.
+    G et H ne sont multipliés qu'une fois, et les doublements sont partagés entre tous les T et C (voir _msm()).
+    Ne dit pas quelle preuve est fausse : en cas d'échec, vérifier une à une.
+    py_ecc ne relâche pas le GIL : pour utiliser plusieurs cœurs, les preuves sont réparties en lots vérifiés chacun
+    de la même façon dans un processus (toutes valides si et seulement si chaque lot l'est).
 
-        # 2. Check: s_v*G + s_r*H == T + c*Commitment
-        left = add(multiply(G, s_v), multiply(H, s_r))
-        right = add(T, multiply(commitment_point, challenge))
-        return eq(left, right)
+    :param pairs: liste de (commitment, proof)
+    :param n_workers: nombre de processus (None : os.cpu_count() ; par défaut 1, dans le processus courant, e.g. quand
+        Blockchain.validity() répartit déjà les blocs sur des processus)
+    """
+    n_workers = min(n_workers or os.cpu_count() or 1, len(pairs) // _MIN_SHARD)
+    if n_workers > 1:
+        pairs = list(pairs)
+        shards = [pairs[i::n_workers] for i in range(n_workers)]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            return all(executor.map(verify_batch, shards))
+    try:
+        a = b = 0
+        terms = []
+        for commitment, proof in pairs:
+            # La combinaison n'a de sens que pour des points du groupe : _parse_proof() rejette les autres
+            commitment_point, T, s_v, s_r, challenge = _parse_proof(commitment, proof)
+            rho = int.from_bytes(os.urandom(16), 'big')
+            a += rho * s_v
+            b += rho * s_r
+            # Points opposés (y changé de signe) : une seule multi-multiplication, qui doit donner le point à l'infini
+            x, y, z = T
+            terms.append(((x, -y, z), rho))
+            x, y, z = commitment_point
+            terms.append(((x, -y, z), rho * challenge))
+        terms.append((G, a))
+        terms.append((H, b))
+        return is_inf(_msm(terms))
     except Exception as e:
         print(f"Erreur de vérification: {e}")
         return False
 
 
+def prove_internal(value, blinding_factor):
+    """prove() sans sérialisation : renvoie un Proof, dont C est le commitment de (value, blinding_factor)."""
+    # value and blinding_factor are coerced once
+    v = _coerce_to_int(value)
+    r = _coerce_to_int(blinding_factor)
+    return prove_knowledge_internal(_commit_int(v, r), v, r)
+
+
 def prove(value, blinding_factor):
     """High-level prove() used by the rest of the code.
     Returns a dict containing the serialized commitment and proof."""
@@ -232,10 +539,8 @@ def prove(value, blinding_factor):
         combined = f"{value}:{blinding_factor}"
         commitment = hashlib.sha256(combined.encode()).hexdigest()
         return {"C": commitment, "secret": value, "nonce": blinding_factor}
-    # create commitment and proof
-    C = commit(value, blinding_factor)
-    proof = prove_knowledge(C, value, blinding_factor)
-    return proof
+    # create commitment and proof, serialized only once at the end
+    return proof_to_dict(prove_internal(value, blinding_factor))
 
 
 def verify_zk(public_commitment, proof):
@@ -246,4 +551,17 @@ def verify_zk(public_commitment, proof):
             return hashlib.sha256(f"{proof['secret']}:{proof['nonce']}".encode()).hexdigest() == public_commitment
         except Exception:
             return False
-    return verify(public_commitment, proof)
\ No newline at end of file
+    # proof peut être un Proof, ou proof["T"] (et le commitment) des points bruts : _parse_proof() les garde tels quels
+    return verify(public_commitment, proof)
+
+
+def verify_zk_batch(pairs, n_workers=1):
+    """High-level batch verification, used by transaction.verify_batch(): same result as
+    all(verify_zk(c, p) for c, p in pairs).
+
+    :param pairs: liste de (public_commitment, proof)
+    :param n_workers: see verify_batch()
+    """
+    if not PYECC_AVAILABLE:
+        return all(verify_zk(c, p) for c, p in pairs)
+    return verify_batch(pairs, n_workers)